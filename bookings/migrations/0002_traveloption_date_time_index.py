@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="traveloption",
+            name="date_time",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
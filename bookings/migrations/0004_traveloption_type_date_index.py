@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 21:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0003_booking_user_date_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="traveloption",
+            index=models.Index(
+                fields=["type", "date_time"], name="travel_type_date_idx"
+            ),
+        ),
+    ]
@@ -11,10 +11,16 @@ class TravelOption(models.Model):
     type = models.CharField(max_length=10, choices=TRAVEL_TYPES)
     source = models.CharField(max_length=100)
     destination = models.CharField(max_length=100)
-    date_time = models.DateTimeField()
+    date_time = models.DateTimeField(db_index=True)
     price = models.DecimalField(max_digits=8, decimal_places=2)
     available_seats = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            # Type filter on the home page, ordered by departure
+            models.Index(fields=['type', 'date_time'], name='travel_type_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.type} - {self.source} to {self.destination}"
 
@@ -31,3 +37,9 @@ class Booking(models.Model):
     booking_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Confirmed')
 
+    class Meta:
+        indexes = [
+            # Serves the per-user, newest-first listing in my_bookings
+            models.Index(fields=['user', '-booking_date'], name='booking_user_date_idx'),
+        ]
+
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Booking, TravelOption
+from .views import _invalidate_home_cache
+
+
+# Catches changes made outside the booking views, e.g. through the admin.
+# Queryset update() calls don't send these signals, so views that only use
+# update() bump the cache themselves.
+@receiver([post_save, post_delete], sender=Booking)
+@receiver([post_save, post_delete], sender=TravelOption)
+def invalidate_home_cache(sender, **kwargs):
+    transaction.on_commit(_invalidate_home_cache)
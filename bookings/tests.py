@@ -1,14 +1,20 @@
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.db import connection
 from django.contrib.auth.models import User
+from django.forms import modelform_factory
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from .models import TravelOption, Booking
+from .views import HOME_CACHE_VERSION_KEY, _invalidate_home_cache
 
 
 class TravelOptionModelTest(TestCase):
-    def setUp(self):
-        self.travel_option = TravelOption.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.travel_option = TravelOption.objects.create(
             type='Flight',
             source='Mumbai',
             destination='Delhi',
@@ -32,12 +38,13 @@ class TravelOptionModelTest(TestCase):
 
 
 class BookingModelTest(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             password='testpass123'
         )
-        self.travel_option = TravelOption.objects.create(
+        cls.travel_option = TravelOption.objects.create(
             type='Train',
             source='Bangalore',
             destination='Chennai',
@@ -45,9 +52,9 @@ class BookingModelTest(TestCase):
             price=800.00,
             available_seats=100
         )
-        self.booking = Booking.objects.create(
-            user=self.user,
-            travel_option=self.travel_option,
+        cls.booking = Booking.objects.create(
+            user=cls.user,
+            travel_option=cls.travel_option,
             number_of_seats=2,
             total_price=1600.00
         )
@@ -65,11 +72,17 @@ class BookingModelTest(TestCase):
         self.assertEqual(self.booking.user.username, 'testuser')
         self.assertEqual(self.booking.travel_option.type, 'Train')
 
+    def test_booking_date_is_not_editable(self):
+        """Test that booking_date is set automatically and kept out of model forms"""
+        self.assertIsNotNone(self.booking.booking_date)
+        form_class = modelform_factory(Booking, fields='__all__')
+        self.assertNotIn('booking_date', form_class.base_fields)
+
 
 class HomeViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.travel_option = TravelOption.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.travel_option = TravelOption.objects.create(
             type='Bus',
             source='Pune',
             destination='Mumbai',
@@ -78,6 +91,9 @@ class HomeViewTest(TestCase):
             available_seats=30
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_home_view_status_code(self):
         """Test that home view returns 200 status code"""
         response = self.client.get(reverse('home'))
@@ -96,21 +112,174 @@ class HomeViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Pune')
 
+    def test_home_view_ignores_short_search(self):
+        """Test that one- and two-character searches do not filter the listing"""
+        for term in ('x', 'xy'):
+            response = self.client.get(reverse('home'), {'search': term})
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'Pune')
+
+        response = self.client.get(reverse('home'), {'search': 'xyz'})
+        self.assertNotContains(response, 'Pune')
+
+    def test_home_view_search_matches_type(self):
+        """Test that search matches travel types case-insensitively"""
+        TravelOption.objects.create(
+            type='Flight',
+            source='Kochi',
+            destination='Hyderabad',
+            date_time=timezone.now() + timedelta(days=2),
+            price=4500.00,
+            available_seats=40
+        )
+        response = self.client.get(reverse('home'), {'search': 'LIG'})
+        self.assertContains(response, 'Kochi')
+        self.assertNotContains(response, 'Pune')
+
     def test_home_view_filter_by_type(self):
         """Test filtering by travel type"""
         response = self.client.get(reverse('home'), {'type': 'Bus'})
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Bus')
 
+    def test_home_view_json_format(self):
+        """Test that the listing can be fetched as JSON"""
+        response = self.client.get(reverse('home'), {'format': 'json', 'type': 'Bus'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['page'], 1)
+        self.assertEqual(len(data['results']), 1)
+        self.assertEqual(data['results'][0]['source'], 'Pune')
+        self.assertEqual(data['results'][0]['available_seats'], 30)
+
+    def test_home_view_hides_past_travel_options(self):
+        """Test that travel options in the past are not listed"""
+        TravelOption.objects.create(
+            type='Flight',
+            source='Kolkata',
+            destination='Jaipur',
+            date_time=timezone.now() - timedelta(days=1),
+            price=3500.00,
+            available_seats=10
+        )
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Pune')
+        self.assertNotContains(response, 'Kolkata')
+
+    def test_home_view_cached_results_refresh_after_booking(self):
+        """Test that cached listings are invalidated when seats change"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.get(reverse('home'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('home'))
+        self.assertFalse(any('bookings_traveloption' in q['sql'] for q in ctx.captured_queries))
+
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('book_travel', args=[self.travel_option.travel_id]), {'seats': 2})
+        self.client.logout()
+
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '<span class="text-success">28</span>', html=True)
+
+    def test_home_view_listing_cached_before_booking_commits_is_dropped(self):
+        """Test that a listing cached while a booking is still uncommitted is not served afterwards"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('book_travel', args=[self.travel_option.travel_id]), {'seats': 2})
+            # A listing rendered before commit is cached under the current version
+            self.client.get(reverse('home'))
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse('home'))
+            self.assertFalse(any('bookings_traveloption' in q['sql'] for q in ctx.captured_queries))
+
+        # Committing bumps the version, so the next request re-reads the seats
+        for callback in callbacks:
+            callback()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('home'))
+        self.assertTrue(any('bookings_traveloption' in q['sql'] for q in ctx.captured_queries))
+
+    def test_home_view_cached_results_refresh_after_model_save(self):
+        """Test that edits made outside the views (e.g. in the admin) invalidate cached listings"""
+        self.client.get(reverse('home'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.travel_option.available_seats = 4
+            self.travel_option.save()
+            TravelOption.objects.create(
+                type='Flight',
+                source='Surat',
+                destination='Goa',
+                date_time=timezone.now() + timedelta(days=3),
+                price=2500.00,
+                available_seats=12
+            )
+
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '<span class="text-danger">4</span>', html=True)
+        self.assertContains(response, 'Surat')
+
+    def test_home_view_cache_ignores_unrelated_params(self):
+        """Test that extra query parameters share the cached listing and stay out of its links"""
+        for i in range(30):
+            TravelOption.objects.create(
+                type='Train',
+                source=f'City{i}',
+                destination='Goa',
+                date_time=timezone.now() + timedelta(days=2, hours=i),
+                price=100.00,
+                available_seats=10
+            )
+        self.client.get(reverse('home'), {'type': 'Train'})
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('home'), {'type': 'Train', 'utm_source': 'mail'})
+        self.assertFalse(any('bookings_traveloption' in q['sql'] for q in ctx.captured_queries))
+        self.assertContains(response, '?type=Train&amp;page=2')
+        self.assertNotContains(response, 'utm_source')
+
+    def test_home_view_cache_invalidation_survives_evicted_version(self):
+        """Test that invalidating after the version key is evicted still drops cached listings"""
+        self.client.get(reverse('home'))
+        cache.delete(HOME_CACHE_VERSION_KEY)
+        _invalidate_home_cache()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('home'))
+        self.assertTrue(any('bookings_traveloption' in q['sql'] for q in ctx.captured_queries))
+
+    def test_home_view_pagination(self):
+        """Test that travel options are split across pages"""
+        for i in range(30):
+            TravelOption.objects.create(
+                type='Train',
+                source=f'City{i}',
+                destination='Goa',
+                date_time=timezone.now() + timedelta(days=2, hours=i),
+                price=100.00,
+                available_seats=10
+            )
+
+        response = self.client.get(reverse('home'))
+        self.assertEqual(len(response.context['travels']), 25)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+
+        response = self.client.get(reverse('home'), {'page': 2})
+        self.assertEqual(len(response.context['travels']), 6)
+
 
 class BookingViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             password='testpass123'
         )
-        self.travel_option = TravelOption.objects.create(
+        cls.travel_option = TravelOption.objects.create(
             type='Flight',
             source='Delhi',
             destination='Mumbai',
@@ -176,15 +345,67 @@ class BookingViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'valid number of seats')
 
+    def test_ajax_booking_returns_json(self):
+        """Test that AJAX bookings get a JSON response instead of a redirect"""
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.post(
+            reverse('book_travel', args=[self.travel_option.travel_id]),
+            {'seats': 2},
+            headers={'X-Requested-With': 'XMLHttpRequest'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['ok'])
+        self.assertEqual(data['total'], '8000.00')
+        self.assertTrue(Booking.objects.filter(booking_id=data['booking_id'], user=self.user).exists())
+
+    def test_ajax_booking_validation_error(self):
+        """Test that AJAX booking validation errors are returned as JSON"""
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.post(
+            reverse('book_travel', args=[self.travel_option.travel_id]),
+            {'seats': 100},
+            headers={'X-Requested-With': 'XMLHttpRequest'},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        data = response.json()
+        self.assertFalse(data['ok'])
+        self.assertIn('seats available', data['error'])
+
+    def test_booking_validation_max_seats_per_booking(self):
+        """Test that a single booking cannot exceed the per-booking seat limit"""
+        self.client.login(username='testuser', password='testpass123')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('book_travel', args=[self.travel_option.travel_id]), {
+                'seats': 11
+            })
+
+        # Rejected before the row is re-read under a lock
+        travel_selects = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT') and 'bookings_traveloption' in q['sql']
+        ]
+        self.assertEqual(len(travel_selects), 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Maximum 10 seats')
+        self.assertFalse(Booking.objects.filter(user=self.user).exists())
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 25)
+
 
 class MyBookingsViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             password='testpass123'
         )
-        self.travel_option = TravelOption.objects.create(
+        cls.travel_option = TravelOption.objects.create(
             type='Train',
             source='Mumbai',
             destination='Pune',
@@ -192,9 +413,9 @@ class MyBookingsViewTest(TestCase):
             price=500.00,
             available_seats=50
         )
-        self.booking = Booking.objects.create(
-            user=self.user,
-            travel_option=self.travel_option,
+        cls.booking = Booking.objects.create(
+            user=cls.user,
+            travel_option=cls.travel_option,
             number_of_seats=1,
             total_price=500.00
         )
@@ -212,15 +433,40 @@ class MyBookingsViewTest(TestCase):
         self.assertContains(response, 'Mumbai')
         self.assertContains(response, 'Pune')
 
+    def test_my_bookings_query_count_is_constant(self):
+        """Test that listing bookings doesn't issue a query per booking"""
+        for i in range(4):
+            travel_option = TravelOption.objects.create(
+                type='Bus',
+                source=f'Town{i}',
+                destination='Nashik',
+                date_time=timezone.now() + timedelta(days=4),
+                price=200.00,
+                available_seats=40
+            )
+            Booking.objects.create(
+                user=self.user,
+                travel_option=travel_option,
+                number_of_seats=1,
+                total_price=200.00,
+                status='Cancelled' if i % 2 else 'Confirmed'
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+        # Session, user, and a single bookings query joined to travel options
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('my_bookings'))
+        self.assertContains(response, 'Town3')
+
 
 class CancelBookingTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             password='testpass123'
         )
-        self.travel_option = TravelOption.objects.create(
+        cls.travel_option = TravelOption.objects.create(
             type='Bus',
             source='Delhi',
             destination='Agra',
@@ -228,9 +474,9 @@ class CancelBookingTest(TestCase):
             price=600.00,
             available_seats=20
         )
-        self.booking = Booking.objects.create(
-            user=self.user,
-            travel_option=self.travel_option,
+        cls.booking = Booking.objects.create(
+            user=cls.user,
+            travel_option=cls.travel_option,
             number_of_seats=3,
             total_price=1800.00
         )
@@ -253,6 +499,70 @@ class CancelBookingTest(TestCase):
         self.travel_option.refresh_from_db()
         self.assertEqual(self.travel_option.available_seats, initial_seats + 3)
 
+    def test_cancel_booking_twice_restores_seats_once(self):
+        """Test that repeating a cancellation does not restore seats again"""
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('cancel_booking', args=[self.booking.booking_id])
+
+        self.client.get(url)
+        self.client.get(url)
+
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 23)
+
+    def test_ajax_cancel_booking_returns_json(self):
+        """Test that AJAX cancellations get a JSON response"""
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('cancel_booking', args=[self.booking.booking_id])
+
+        response = self.client.get(url, headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['ok'])
+
+        response = self.client.get(url, headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['ok'])
+
+    def test_htmx_cancel_booking_returns_no_content(self):
+        """Test that htmx cancellations get a 204 with an event trigger instead of a redirect"""
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.get(
+            reverse('cancel_booking', args=[self.booking.booking_id]),
+            headers={'HX-Request': 'true'},
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['HX-Trigger'], 'bookingCancelled')
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'Cancelled')
+
+    def test_cannot_cancel_other_users_booking(self):
+        """Test that a user cannot cancel someone else's booking"""
+        User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.login(username='otheruser', password='testpass123')
+
+        response = self.client.get(reverse('cancel_booking', args=[self.booking.booking_id]))
+        self.assertEqual(response.status_code, 404)
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'Confirmed')
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 20)
+
+    def test_cancel_booking_does_not_load_travel_option(self):
+        """Test that cancelling restores seats without a separate travel option SELECT"""
+        self.client.login(username='testuser', password='testpass123')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('cancel_booking', args=[self.booking.booking_id]))
+
+        travel_selects = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT') and 'bookings_traveloption' in q['sql']
+        ]
+        self.assertEqual(travel_selects, [])
+
 
 class UserRegistrationTest(TestCase):
     def setUp(self):
@@ -281,9 +591,9 @@ class UserRegistrationTest(TestCase):
 
 
 class ProfileViewTest(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             password='testpass123',
             first_name='Test',
@@ -1,20 +1,67 @@
+import hashlib
+import time
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict
+from django.template.loader import render_to_string
 from .models import TravelOption, Booking
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 
-# Home - List all travel options
-def home(request):
-    travels = TravelOption.objects.all()
-    travel_type = request.GET.get('type')
-    source = request.GET.get('source')
-    destination = request.GET.get('destination')
-    date = request.GET.get('date')
-    search_query = request.GET.get('search')
+HOME_PAGE_SIZE = 25
+MIN_SEARCH_LENGTH = 3
+HOME_CACHE_TIMEOUT = 60  # seconds
+HOME_CACHE_VERSION_KEY = 'home:version'
+HOME_CACHE_PARAMS = ('type', 'source', 'destination', 'date', 'search', 'page')
+TRAVEL_LIST_FIELDS = (
+    'travel_id', 'type', 'source', 'destination', 'date_time', 'price', 'available_seats',
+)
+
+
+def _home_params(request):
+    # Only the parameters that change the listing, so unrelated query string
+    # noise neither fragments the cache nor ends up in cached page links
+    params = QueryDict(mutable=True)
+    for name in HOME_CACHE_PARAMS:
+        if name in request.GET:
+            params.setlist(name, request.GET.getlist(name))
+    return params
+
+
+def _home_cache_key(params, request):
+    # Bumping the version orphans every cached listing at once. Versions are
+    # seeded from the clock so a version key that was evicted and recreated
+    # can't come back as a number that live entries are still stored under
+    version = cache.get_or_set(HOME_CACHE_VERSION_KEY, time.time_ns, None)
+    parts = (sorted(params.lists()), request.user.is_authenticated)
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'home:{version}:{digest}'
+
+
+def _invalidate_home_cache():
+    # With the default per-process LocMemCache this only reaches the current
+    # worker; other workers fall back to HOME_CACHE_TIMEOUT. Configure a
+    # shared cache backend for cross-process invalidation.
+    try:
+        cache.incr(HOME_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(HOME_CACHE_VERSION_KEY, time.time_ns(), None)
+
+
+def _is_ajax(request):
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def _filter_travels(travel_type, source, destination, date, search_query):
+    # Past travels can't be booked, so don't list them
+    travels = TravelOption.objects.filter(date_time__gte=timezone.now())
 
     # Apply filters
     if travel_type:
@@ -25,20 +72,60 @@ def home(request):
         travels = travels.filter(destination__icontains=destination)
     if date:
         travels = travels.filter(date_time__date=date)
-    
-    # Apply search across multiple fields
-    if search_query:
+
+    # Apply search across multiple fields. One- and two-character terms match
+    # nearly every row, so they aren't worth the scans
+    search_query = (search_query or '').strip()
+    if len(search_query) >= MIN_SEARCH_LENGTH:
         travels = travels.filter(
             models.Q(source__icontains=search_query) |
             models.Q(destination__icontains=search_query) |
             models.Q(type__icontains=search_query)
         )
 
-    # Order by date (earliest first)
-    travels = travels.order_by('date_time')
+    # Order by date (earliest first). The listing is read-only, so plain dicts
+    # are enough and skip building a model instance per row
+    return travels.order_by('date_time').values(*TRAVEL_LIST_FIELDS)
+
+
+# Home - List all travel options
+def home(request):
+    travel_type = request.GET.get('type')
+    source = request.GET.get('source')
+    destination = request.GET.get('destination')
+    date = request.GET.get('date')
+    search_query = request.GET.get('search')
+
+    # API clients get the raw listing without going through the template layer
+    if request.GET.get('format') == 'json':
+        travels = _filter_travels(travel_type, source, destination, date, search_query)
+        page_obj = Paginator(travels, HOME_PAGE_SIZE).get_page(request.GET.get('page'))
+        return JsonResponse({
+            'results': list(page_obj),
+            'page': page_obj.number,
+            'num_pages': page_obj.paginator.num_pages,
+        })
+
+    # The results table is the same for everyone sending the same filters, so
+    # serve it from cache and only hit the database on a miss
+    params = _home_params(request)
+    cache_key = _home_cache_key(params, request)
+    results = cache.get(cache_key)
+    if results is None:
+        travels = _filter_travels(travel_type, source, destination, date, search_query)
+
+        # Only fetch and render one page of results at a time
+        page_obj = Paginator(travels, HOME_PAGE_SIZE).get_page(request.GET.get('page'))
+
+        results = render_to_string(
+            'bookings/_travel_results.html',
+            {'travels': page_obj, 'page_obj': page_obj, 'params': params},
+            request=request,
+        )
+        cache.set(cache_key, results, HOME_CACHE_TIMEOUT)
 
     context = {
-        'travels': travels,
+        'results': results,
         'filters': {
             'type': travel_type or '',
             'source': source or '',
@@ -56,6 +143,8 @@ def book_travel(request, travel_id):
     
     # Check if travel is in the past
     if travel.date_time < timezone.now():
+        if _is_ajax(request):
+            return JsonResponse({'ok': False, 'error': 'Cannot book travel options in the past.'}, status=400)
         messages.error(request, 'Cannot book travel options in the past.')
         return redirect('home')
     
@@ -67,52 +156,96 @@ def book_travel(request, travel_id):
             
         # Enhanced validation
         if seats < 1:
-            messages.error(request, 'Please enter a valid number of seats (minimum 1).')
+            error = 'Please enter a valid number of seats (minimum 1).'
         elif seats > travel.available_seats:
-            messages.error(request, f'Only {travel.available_seats} seats available. Please select fewer seats.')
+            error = f'Only {travel.available_seats} seats available. Please select fewer seats.'
         elif seats > 10:  # Reasonable limit
-            messages.error(request, 'Maximum 10 seats can be booked at once.')
+            error = 'Maximum 10 seats can be booked at once.'
         else:
-            # Double-check availability (in case of concurrent bookings)
-            travel.refresh_from_db()
-            if travel.available_seats >= seats:
-                total_price = seats * travel.price
-                Booking.objects.create(
-                    user=request.user,
-                    travel_option=travel,
-                    number_of_seats=seats,
-                    total_price=total_price,
-                    booking_date=timezone.now()
-                )
-                travel.available_seats -= seats
-                travel.save()
-                messages.success(request, f'Booking confirmed! {seats} seat(s) booked for ₹{total_price}')
-                return redirect('my_bookings')
-            else:
-                messages.error(request, 'Seats no longer available. Please try again.')
+            with transaction.atomic():
+                # Lock the row so concurrent bookings can't both pass the seat check
+                travel = TravelOption.objects.select_for_update().get(travel_id=travel_id)
+                if seats > travel.available_seats:
+                    error = f'Only {travel.available_seats} seats available. Please select fewer seats.'
+                else:
+                    total_price = seats * travel.price
+                    booking = Booking.objects.create(
+                        user=request.user,
+                        travel_option=travel,
+                        number_of_seats=seats,
+                        total_price=total_price
+                    )
+                    TravelOption.objects.filter(pk=travel.pk).update(
+                        available_seats=F('available_seats') - seats
+                    )
+                    # Creating the booking already queued a home cache bump for
+                    # after commit (see signals.py)
+                    if _is_ajax(request):
+                        return JsonResponse({'ok': True, 'booking_id': booking.booking_id, 'total': total_price})
+                    messages.success(request, f'Booking confirmed! {seats} seat(s) booked for ₹{total_price}')
+                    return redirect('my_bookings')
+
+        if _is_ajax(request):
+            return JsonResponse({'ok': False, 'error': error}, status=400)
+        messages.error(request, error)
     
     return render(request, 'bookings/book.html', {'travel': travel})
 
 # View bookings
 @login_required
 def my_bookings(request):
-    bookings = Booking.objects.filter(user=request.user).order_by('-booking_date')
-    current = bookings.filter(status='Confirmed')
-    past = bookings.exclude(status='Confirmed')
+    # Evaluate once and split in Python so the template's truthiness checks
+    # and loops don't each hit the database
+    bookings = list(
+        Booking.objects.filter(user=request.user)
+        .select_related('travel_option')
+        .order_by('-booking_date')
+    )
+    current = [b for b in bookings if b.status == 'Confirmed']
+    past = [b for b in bookings if b.status != 'Confirmed']
     return render(request, 'bookings/my_bookings.html', {'current': current, 'past': past})
 
 # Cancel booking
 @login_required
 def cancel_booking(request, booking_id):
-    booking = get_object_or_404(Booking, booking_id=booking_id)
-    if booking.status != 'Cancelled':
-        booking.status = 'Cancelled'
-        booking.save()
-        # restore seats
-        travel = booking.travel_option
-        travel.available_seats += booking.number_of_seats
-        travel.save()
+    with transaction.atomic():
+        # Lock the booking and read only what's needed to restore seats
+        booking = (
+            Booking.objects.select_for_update()
+            .filter(booking_id=booking_id, user=request.user)
+            .values_list('number_of_seats', 'travel_option_id')
+            .first()
+        )
+        if booking is None:
+            raise Http404('No Booking matches the given query.')
+        number_of_seats, travel_option_id = booking
+        # The status check is part of the UPDATE, so the rowcount tells us
+        # whether this request is the one that cancelled it
+        cancelled = (
+            Booking.objects.filter(booking_id=booking_id)
+            .exclude(status='Cancelled')
+            .update(status='Cancelled')
+        )
+        if cancelled:
+            # restore seats
+            TravelOption.objects.filter(pk=travel_option_id).update(
+                available_seats=F('available_seats') + number_of_seats
+            )
+            # update() sends no signals, so bump the home cache here, once the
+            # new seat count is visible
+            transaction.on_commit(_invalidate_home_cache)
+    if cancelled:
+        # htmx clients update the row themselves, so skip the redirect and
+        # the full my_bookings re-render that would follow it
+        if request.headers.get('HX-Request'):
+            return HttpResponse(status=204, headers={'HX-Trigger': 'bookingCancelled'})
+        if _is_ajax(request):
+            return JsonResponse({'ok': True})
         messages.info(request, 'Booking cancelled.')
+    elif request.headers.get('HX-Request'):
+        return HttpResponse(status=204)
+    elif _is_ajax(request):
+        return JsonResponse({'ok': False, 'error': 'Booking is already cancelled.'}, status=400)
     return redirect('my_bookings')
 
 # Registration
@@ -132,10 +265,12 @@ def register(request):
 def profile(request):
     user: User = request.user
     if request.method == 'POST':
-        user.first_name = request.POST.get('first_name', '')
-        user.last_name = request.POST.get('last_name', '')
-        user.email = request.POST.get('email', '')
-        user.save()
+        # Only write the three editable columns, not the whole auth_user row
+        User.objects.filter(pk=user.pk).update(
+            first_name=request.POST.get('first_name', ''),
+            last_name=request.POST.get('last_name', ''),
+            email=request.POST.get('email', ''),
+        )
         messages.success(request, 'Profile updated.')
         return redirect('profile')
     return render(request, 'registration/profile.html', {'user': user})